@@ -1,16 +1,28 @@
-# pip install requests tqdm networkx pandas
+# pip install requests tqdm networkx pandas numpy  (optional: numba, simsimd, scikit-learn)
+import re
 import time
 import math
+import shelve
+import functools
+import threading
 import requests
+import numpy as np
 import networkx as nx
-from itertools import combinations
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
 # -----------------------------
 # Config
 # -----------------------------
 USER_AGENT = "your-app-name/1.0 (you@example.com)"  # set a real UA/email per Nominatim policy
-GEOCODE_SLEEP_SEC = 1.1  # be nice to the service
+GEOCODE_SLEEP_SEC = 1.1  # be nice to the service: one request per interval
+GEOCODE_WORKERS = 8  # concurrent lookups; lower GEOCODE_SLEEP_SEC for a self-hosted Nominatim
+DISTANCE_DTYPE = np.float32  # ~metre precision at UK scale; halves memory traffic vs float64
+NUMBA_MIN_POINTS = 2000  # below this, importing/compiling numba costs more than it saves
+PAIRWISE_BACKEND = "auto"  # "auto" (numba for large N, else NumPy: fastest measured), "simsimd" or "sklearn"
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+GEOCODE_CACHE_PATH = "geocode_cache"  # on-disk shelve reused across runs
+GEOCODE_CACHE_TTL_SEC = 30 * 86400  # re-geocode entries (including misses) older than this
 
 # Example input: replace with your own list or read from CSV
 addresses = [
@@ -23,14 +35,75 @@ addresses = [
 # -----------------------------
 # Helpers
 # -----------------------------
-def geocode_address(addr):
-    """Geocode an address via Nominatim. Returns (lat, lon) floats or None."""
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"q": addr, "format": "jsonv2", "addressdetails": 0, "limit": 1}
+UK_POSTCODE_RE = re.compile(r"\b([A-Z]{1,2}\d[\dA-Z]?\s*\d[A-Z]{2})\b", re.IGNORECASE)
+STREET_RE = re.compile(r"^\d+[A-Z]?\s+\S")
+
+class TokenBucket:
+    """Rate limiter handing out one token every `interval` seconds."""
+
+    def __init__(self, interval, capacity=1):
+        self._tokens = threading.BoundedSemaphore(capacity)
+        self._interval = interval
+        threading.Thread(target=self._refill, daemon=True).start()
+
+    def _refill(self):
+        while True:
+            time.sleep(self._interval)
+            try:
+                self._tokens.release()
+            except ValueError:  # bucket already full
+                pass
+
+    def acquire(self):
+        self._tokens.acquire()
+
+def structured_params(addr):
+    """Split "<number> <street>, <city> <postcode>, UK" into Nominatim structured
+    query params. Returns None when the address doesn't look like that."""
+    parts = [p.strip() for p in addr.split(",") if p.strip()]
+    if len(parts) < 2 or not STREET_RE.match(parts[0]):
+        return None
+    params = {"street": parts[0]}
+    rest = parts[1:]
+    if rest[-1].upper() in ("UK", "GB", "UNITED KINGDOM"):
+        params["country"] = "United Kingdom"
+        rest = rest[:-1]
+    city_parts = []
+    for part in rest:
+        m = UK_POSTCODE_RE.search(part)
+        if m:
+            params["postalcode"] = m.group(1).upper()
+            part = (part[:m.start()] + part[m.end():]).strip()
+        if part:
+            city_parts.append(part)
+    if "postalcode" not in params:
+        return None
+    if city_parts:
+        params["city"] = ", ".join(city_parts)
+    return params
+
+def cache_key(addr):
+    return " ".join(addr.split()).lower()
+
+def nominatim_search(params, limiter):
+    limiter.acquire()
+    query = {"format": "jsonv2", "addressdetails": 0, "limit": 1, **params}
     headers = {"User-Agent": USER_AGENT}
-    r = requests.get(url, params=params, headers=headers, timeout=30)
+    r = requests.get(NOMINATIM_URL, params=query, headers=headers, timeout=30)
     r.raise_for_status()
-    data = r.json()
+    return r.json()
+
+def geocode_address(addr, limiter):
+    """Geocode an address via Nominatim. Returns (lat, lon) floats or None.
+
+    Uses a structured query when the address parses cleanly, falling back to
+    free-form search if that finds nothing."""
+    data = None
+    params = structured_params(addr)
+    if params:
+        data = nominatim_search(params, limiter)
+    if not data:
+        data = nominatim_search({"q": addr}, limiter)
     if not data:
         return None
     return float(data[0]["lat"]), float(data[0]["lon"])
@@ -44,26 +117,118 @@ def haversine_km(lat1, lon1, lat2, lon2):
     a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
     return 2 * R * math.asin(math.sqrt(a))
 
+def haversine_matrix_km(latlon):
+    """Pairwise great-circle distances (km) for an (N, 2) array of lat/lon degrees."""
+    R = 6371.0088  # mean Earth radius (km)
+    latlon = np.radians(np.asarray(latlon, dtype=DISTANCE_DTYPE))
+    lat, lon = latlon[:, 0], latlon[:, 1]
+    dphi = lat[:, None] - lat[None, :]
+    dlambda = lon[:, None] - lon[None, :]
+    a = np.sin(dphi/2)**2 + np.cos(lat)[:, None]*np.cos(lat)[None, :]*np.sin(dlambda/2)**2
+    return 2 * R * np.arcsin(np.sqrt(a))
+
+@functools.lru_cache(maxsize=None)
+def numba_haversine_pairs():
+    """Import numba and build the fused pairwise kernel on first use (compiled
+    code is cached on disk). Returns None when numba isn't installed."""
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return None
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def haversine_pairs(lat, lon, out):
+        """Fill `out` with upper-triangle distances (km) for radian lat/lon arrays,
+        in np.triu_indices(N, 1) order. `out` must have length N*(N-1)//2."""
+        R = 6371.0088  # mean Earth radius (km)
+        n = lat.shape[0]
+        for i in prange(n):
+            base = i*n - i*(i+1)//2 - i - 1
+            cos_i = math.cos(lat[i])
+            for j in range(i+1, n):
+                s_phi = math.sin((lat[j] - lat[i])/2)
+                s_lambda = math.sin((lon[j] - lon[i])/2)
+                a = s_phi*s_phi + cos_i*math.cos(lat[j])*s_lambda*s_lambda
+                out[base + j] = 2 * R * math.asin(math.sqrt(a))
+
+    return haversine_pairs
+
+def chord_haversine_matrix_km(latlon):
+    """Pairwise great-circle distances (km) via SimSIMD. SimSIMD has no haversine
+    kernel, so points go onto the unit sphere and the Euclidean chord c between
+    them is converted with d = 2R*asin(c/2), which is exactly the haversine."""
+    import simsimd  # optional; only imported when selected
+    R = 6371.0088  # mean Earth radius (km)
+    latlon = np.radians(np.asarray(latlon, dtype=DISTANCE_DTYPE))
+    lat, lon = latlon[:, 0], latlon[:, 1]
+    xyz = np.stack([np.cos(lat)*np.cos(lon), np.cos(lat)*np.sin(lon), np.sin(lat)], axis=1)
+    chord = np.asarray(simsimd.cdist(xyz, xyz, metric="euclidean"))
+    return 2 * R * np.arcsin(np.minimum(chord/2, 1.0))
+
+def sklearn_haversine_matrix_km(latlon):
+    """Pairwise great-circle distances (km) via scikit-learn (float64)."""
+    from sklearn.metrics.pairwise import haversine_distances  # ~0.8 s import; only when selected
+    R = 6371.0088  # mean Earth radius (km)
+    return R * haversine_distances(np.radians(np.asarray(latlon, dtype=np.float64)))
+
+def pairwise_haversine_km(latlon):
+    """Upper-triangle distances (km) for an (N, 2) array of lat/lon degrees.
+    Returns (iu, ju, d) with iu, ju = np.triu_indices(N, 1). With PAIRWISE_BACKEND
+    = "auto" the numba kernel is used for at least NUMBA_MIN_POINTS points and the
+    NumPy broadcast otherwise; SimSIMD and scikit-learn measured slower, so they
+    run only when selected."""
+    latlon = np.asarray(latlon, dtype=DISTANCE_DTYPE)
+    n = len(latlon)
+    iu, ju = np.triu_indices(n, 1)
+    if PAIRWISE_BACKEND == "simsimd":
+        d = chord_haversine_matrix_km(latlon)
+    elif PAIRWISE_BACKEND == "sklearn":
+        d = sklearn_haversine_matrix_km(latlon)
+    else:
+        haversine_pairs = numba_haversine_pairs() if n >= NUMBA_MIN_POINTS else None
+        if haversine_pairs is not None:
+            rad = np.radians(latlon)
+            out = np.empty(n*(n-1)//2, dtype=DISTANCE_DTYPE)
+            haversine_pairs(np.ascontiguousarray(rad[:, 0]), np.ascontiguousarray(rad[:, 1]), out)
+            return iu, ju, out
+        d = haversine_matrix_km(latlon)
+    return iu, ju, d[iu, ju].astype(DISTANCE_DTYPE, copy=False)
+
 # -----------------------------
-# Geocode (with simple cache & rate limiting)
+# Geocode (persistent cache, then concurrent token-bucket rate limited lookups)
 # -----------------------------
-cache = {}
-coords = {}
-for addr in tqdm(addresses, desc="Geocoding"):
-    if addr in cache:
-        coords[addr] = cache[addr]
-        continue
-    try:
-        result = geocode_address(addr)
-        cache[addr] = result
-        coords[addr] = result
-    except requests.HTTPError as e:
-        print(f"HTTP error for '{addr}': {e}")
-        coords[addr] = None
-    except Exception as e:
-        print(f"Error for '{addr}': {e}")
-        coords[addr] = None
-    time.sleep(GEOCODE_SLEEP_SEC)
+unique_addresses = list(dict.fromkeys(addresses))
+coords = {addr: None for addr in unique_addresses}
+with shelve.open(GEOCODE_CACHE_PATH) as cache:
+    misses = []
+    for addr in unique_addresses:
+        key = cache_key(addr)
+        entry = cache.get(key)  # (timestamp, result)
+        if entry is not None and time.time() - entry[0] < GEOCODE_CACHE_TTL_SEC:
+            coords[addr] = entry[1]
+        else:
+            misses.append(addr)
+    print(f"Geocode cache hits: {len(unique_addresses) - len(misses)}/{len(unique_addresses)}")
+
+    if misses:
+        limiter = TokenBucket(GEOCODE_SLEEP_SEC)
+        # Progress is updated only from this thread, and redrawn sparingly
+        pbar = tqdm(total=len(misses), desc="Geocoding", mininterval=0.5, miniters=max(1, len(misses) // 100))
+        try:
+            with ThreadPoolExecutor(max_workers=GEOCODE_WORKERS) as pool:
+                futures = {pool.submit(geocode_address, addr, limiter): addr for addr in misses}
+                for fut in as_completed(futures):
+                    addr = futures[fut]
+                    try:
+                        coords[addr] = fut.result()
+                        cache[cache_key(addr)] = (time.time(), coords[addr])
+                    except requests.HTTPError as e:
+                        print(f"HTTP error for '{addr}': {e}")
+                    except Exception as e:
+                        print(f"Error for '{addr}': {e}")
+                    pbar.update(1)
+        finally:
+            pbar.close()
 
 # Filter out failures
 resolved = {a: c for a, c in coords.items() if c is not None}
@@ -76,39 +241,43 @@ if unresolved:
 # -----------------------------
 G = nx.Graph()
 # Add nodes with attributes
-for addr, (lat, lon) in resolved.items():
-    G.add_node(addr, lat=lat, lon=lon)
+G.add_nodes_from((addr, {"lat": lat, "lon": lon}) for addr, (lat, lon) in resolved.items())
 
-# Option A: fully connected (complete) graph with distance weights
-for a, b in combinations(resolved.keys(), 2):
-    (lat1, lon1) = resolved[a]
-    (lat2, lon2) = resolved[b]
-    dist_km = haversine_km(lat1, lon1, lat2, lon2)
-    G.add_edge(a, b, weight=dist_km)
+# Option A: fully connected (complete) graph with distance weights, bulk-loaded
+# from plain Python lists (indexing `keys` with NumPy ints is slow)
+keys = list(resolved)
+if len(keys) >= 2:
+    iu, ju, d = pairwise_haversine_km(list(resolved.values()))
+    G.add_weighted_edges_from(
+        zip([keys[i] for i in iu.tolist()], [keys[j] for j in ju.tolist()], d.tolist())
+    )
 
 # ---- Optional alternatives ----
+# Options B and C use a BallTree over radian coordinates (pip install scikit-learn)
+# from sklearn.neighbors import BallTree
+# R_KM = 6371.0088
+# pts = np.radians(np.array(list(resolved.values())))
+# tree = BallTree(pts, metric="haversine")
+
 # Option B (sparse): only connect if within a threshold, e.g., <= 50 km
 # THRESH_KM = 50
-# for a, b in combinations(resolved.keys(), 2):
-#     (lat1, lon1) = resolved[a]
-#     (lat2, lon2) = resolved[b]
-#     dist_km = haversine_km(lat1, lon1, lat2, lon2)
-#     if dist_km <= THRESH_KM:
-#         G.add_edge(a, b, weight=dist_km)
+# idx, dist = tree.query_radius(pts, r=THRESH_KM / R_KM, return_distance=True)
+# G.add_weighted_edges_from(
+#     (keys[i], keys[j], d_rad * R_KM)
+#     for i in range(len(keys))
+#     for j, d_rad in zip(idx[i].tolist(), dist[i].tolist())
+#     if j > i
+# )
 
 # Option C (sparse): k-nearest neighbors per node (k=3)
 # k = 3
-# for a in resolved.keys():
-#     distances = []
-#     (lat1, lon1) = resolved[a]
-#     for b in resolved.keys():
-#         if a == b:
-#             continue
-#         (lat2, lon2) = resolved[b]
-#         distances.append((b, haversine_km(lat1, lon1, lat2, lon2)))
-#     distances.sort(key=lambda x: x[1])
-#     for b, dist_km in distances[:k]:
-#         G.add_edge(a, b, weight=dist_km)
+# dist, idx = tree.query(pts, k=min(k + 1, len(keys)))
+# G.add_weighted_edges_from(
+#     (keys[i], keys[j], d_rad * R_KM)
+#     for i in range(len(keys))
+#     for j, d_rad in zip(idx[i].tolist(), dist[i].tolist())
+#     if j != i
+# )
 
 # -----------------------------
 # Done: you now have a weighted relational graph
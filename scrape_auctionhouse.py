@@ -13,21 +13,67 @@ from __future__ import annotations
 import argparse
 import csv
 import logging
+import multiprocessing
+import os
 import re
 import sys
 import time
-import xml.etree.ElementTree as ET
-from dataclasses import asdict, dataclass
-from typing import Iterable, List, Optional, Set
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 from urllib.parse import urlparse
 
 import requests
+import requests_cache
 from bs4 import BeautifulSoup
+from lxml import etree
+from requests.adapters import HTTPAdapter
 
 
 DEFAULT_SITEMAP_URL = "https://www.auctionhouse.co.uk/sitemap.xml"
 DEFAULT_DELAY_SEC = 0.75
+DEFAULT_WORKERS = 8
+DEFAULT_PARSE_WORKERS = os.cpu_count() or 1
 DEFAULT_USER_AGENT = "AucTok-scraper/0.1 (+https://example.com/contact)"
+DEFAULT_CACHE_NAME = "auctionhouse_cache"
+DEFAULT_CACHE_TTL_SEC = 3600
+CSV_FIELDNAMES = ["url", "title", "address", "guide_price", "status", "auction_date", "lot_number"]
+CSV_FLUSH_EVERY = 25
+
+ADDRESS_CLASS_RES = [
+    re.compile(cls, re.IGNORECASE)
+    for cls in ["address", "property-address", "lot-address", "address-block"]
+]
+STATUS_CLASS_RES = [re.compile(cls, re.IGNORECASE) for cls in ["status", "availability", "flag", "badge"]]
+ADDRESS_WINDOW_CHARS = 80  # text kept before a postcode in the address fallback
+POSTCODE_RE = re.compile(r"\b[A-Z]{1,2}\d[\dA-Z]?\s*\d[A-Z]{2}\b")  # UK postcode
+GUIDE_PRICE_RE = re.compile(
+    r"Guide\s*Price\s*[:\-]?\s*(£?[\d,]+(?:\.\d{2})?(?:\s*to\s*£?[\d,]+(?:\.\d{2})?)?)",
+    re.IGNORECASE,
+)
+AUCTION_DATE_RES = [
+    re.compile(r"Auction\s*Date\s*[:\-]?\s*([^\n]+)", re.IGNORECASE),
+    re.compile(r"Bidding\s+closes\s*[:\-]?\s*([^\n]+)", re.IGNORECASE),
+]
+LOT_NUMBER_RE = re.compile(r"Lot\s*(\d+)", re.IGNORECASE)
+STATUS_RE = re.compile(
+    r"(available|for\s+sale|bidding\s+open|unsold|sold\s+prior|sold|withdrawn|postponed)",
+    re.IGNORECASE,
+)
+# Raw-HTML approximation of extract_status's first choice: the first element
+# whose class contains "status" (outside comments and script/style blocks), and
+# whether its own text opens with a sold flag. Only opening tags and whitespace
+# may precede that text, so an empty element never borrows a sibling's text.
+# Void elements have no text of their own, so extract_status moves past them.
+STATUS_SCAN_RE = re.compile(
+    r"""<!--.*?-->|<(script|style)\b.*?</\1\s*>"""
+    r"""|(?P<tag><(?P<name>[a-z][a-z0-9]*)\b[^>]*?(?<![\w-])class\s*=\s*["'][^"']*status[^"']*["'][^>]*>)""",
+    re.IGNORECASE | re.DOTALL,
+)
+VOID_TAGS = {"img", "input", "br", "hr", "meta", "link", "source", "wbr"}
+SOLD_TEXT_RE = re.compile(r"(?:\s|<[a-z][^>]*>)*(sold|withdrawn|exchanged|completed|contracted)\b", re.IGNORECASE)
 
 
 @dataclass
@@ -43,11 +89,36 @@ class PropertyRecord:
     lot_number: Optional[str]
 
     def to_row(self) -> dict:
-        return asdict(self)
+        # Explicit dict rather than dataclasses.asdict, which deep-copies every field.
+        return {
+            "url": self.url,
+            "title": self.title,
+            "address": self.address,
+            "guide_price": self.guide_price,
+            "status": self.status,
+            "auction_date": self.auction_date,
+            "lot_number": self.lot_number,
+        }
+
 
+def build_session(
+    user_agent: str = DEFAULT_USER_AGENT,
+    pool_size: int = DEFAULT_WORKERS,
+    cache: bool = False,
+) -> requests.Session:
+    """Build an HTTP session, optionally backed by an on-disk response cache."""
 
-def build_session(user_agent: str = DEFAULT_USER_AGENT) -> requests.Session:
-    session = requests.Session()
+    if cache:
+        session = requests_cache.CachedSession(
+            DEFAULT_CACHE_NAME,
+            expire_after=DEFAULT_CACHE_TTL_SEC,
+            allowable_methods=("GET",),
+        )
+    else:
+        session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     session.headers.update(
         {
             "User-Agent": user_agent,
@@ -57,20 +128,21 @@ def build_session(user_agent: str = DEFAULT_USER_AGENT) -> requests.Session:
     return session
 
 
-def fetch_text(
+def _get_with_retries(
     session: requests.Session,
     url: str,
     *,
     retries: int = 3,
     backoff: float = 1.5,
     timeout: int = 30,
-) -> str:
+    stream: bool = False,
+) -> requests.Response:
     last_error: Optional[Exception] = None
     for attempt in range(1, retries + 1):
         try:
-            response = session.get(url, timeout=timeout)
+            response = session.get(url, timeout=timeout, stream=stream)
             response.raise_for_status()
-            return response.text
+            return response
         except Exception as exc:  # requests can raise many subclasses
             last_error = exc
             if attempt >= retries:
@@ -81,6 +153,42 @@ def fetch_text(
     raise RuntimeError(f"Failed to fetch {url}: {last_error}")
 
 
+def fetch_text(
+    session: requests.Session,
+    url: str,
+    *,
+    retries: int = 3,
+    backoff: float = 1.5,
+    timeout: int = 30,
+) -> str:
+    return _get_with_retries(session, url, retries=retries, backoff=backoff, timeout=timeout).text
+
+
+def iter_sitemap_locs(session: requests.Session, url: str) -> Iterator[Tuple[str, str]]:
+    """Stream a sitemap and yield ``(root_tag, loc)`` pairs.
+
+    ``root_tag`` is the lower-cased local name of the document element
+    (``sitemapindex`` or ``urlset``). Entries are discarded as soon as they
+    have been read, so memory use does not grow with the sitemap size.
+    """
+
+    with _get_with_retries(session, url, stream=True) as response:
+        response.raw.decode_content = True
+        root = None
+        root_tag = ""
+        for event, elem in etree.iterparse(response.raw, events=("start", "end"), resolve_entities=False):
+            if event == "start":
+                if root is None:
+                    root = elem
+                    root_tag = etree.QName(elem).localname.lower()
+                continue
+            if etree.QName(elem).localname == "loc":
+                yield root_tag, (elem.text or "").strip()
+            if elem.getparent() is root:
+                elem.clear()
+                root.remove(elem)
+
+
 def looks_like_property_url(url: str) -> bool:
     parsed = urlparse(url)
     path = parsed.path.lower()
@@ -106,31 +214,23 @@ def iter_sitemap_property_urls(
         visited.add(current)
 
         logging.info("Fetching sitemap: %s", current)
-        body = fetch_text(session, current)
         try:
-            root = ET.fromstring(body)
-        except ET.ParseError as exc:
-            logging.warning("Could not parse sitemap %s: %s", current, exc)
-            continue
-
-        tag = root.tag.lower()
-        if tag.endswith("sitemapindex"):
-            for loc in root.findall(".//{*}loc"):
-                loc_text = (loc.text or "").strip()
-                if not loc_text or loc_text in visited:
-                    continue
-                if len(visited) + len(to_visit) >= max_nested:
-                    logging.warning("Skipping sitemap %s; max depth %s reached", loc_text, max_nested)
-                    continue
-                if loc_text.endswith(".xml"):
-                    to_visit.append(loc_text)
-        else:
-            for loc in root.findall(".//{*}loc"):
-                loc_text = (loc.text or "").strip()
+            for root_tag, loc_text in iter_sitemap_locs(session, current):
                 if not loc_text:
                     continue
-                if looks_like_property_url(loc_text):
+                if root_tag == "sitemapindex":
+                    if loc_text in visited:
+                        continue
+                    if len(visited) + len(to_visit) >= max_nested:
+                        logging.warning("Skipping sitemap %s; max depth %s reached", loc_text, max_nested)
+                        continue
+                    if loc_text.endswith(".xml"):
+                        to_visit.append(loc_text)
+                elif looks_like_property_url(loc_text):
                     property_urls.add(loc_text)
+        except etree.XMLSyntaxError as exc:
+            logging.warning("Could not parse sitemap %s: %s", current, exc)
+            continue
 
     return sorted(property_urls)
 
@@ -146,74 +246,76 @@ def extract_title(soup: BeautifulSoup) -> Optional[str]:
     return _first_text(soup.find("h1")) or _first_text(soup.title)
 
 
-def extract_address(soup: BeautifulSoup) -> Optional[str]:
+def extract_address(soup: BeautifulSoup, text_blob: str) -> Optional[str]:
     # Prefer explicit address containers
-    for cls in ["address", "property-address", "lot-address", "address-block"]:
-        node = soup.find(class_=re.compile(cls, re.IGNORECASE))
+    for pattern in ADDRESS_CLASS_RES:
+        node = soup.find(class_=pattern)
         text = _first_text(node)
         if text:
             return text
 
-    # Fallback: look for a postal pattern within common tags
-    for tag_name in ["p", "div", "span", "li"]:
-        for node in soup.find_all(tag_name):
-            text = _first_text(node)
-            if not text:
-                continue
-            if re.search(r"\b[A-Z]{1,2}\d[\dA-Z]?\s*\d[A-Z]{2}\b", text):  # UK postcode
-                return text
+    # Fallback: take the text leading up to the first UK postcode on the page.
+    # text_blob has one text node per line, so join the window's lines back up,
+    # dropping a leading line that the window cut part-way through.
+    match = POSTCODE_RE.search(text_blob)
+    if match:
+        start = max(0, match.start() - ADDRESS_WINDOW_CHARS)
+        lines = text_blob[start: match.end()].split("\n")
+        if start > 0 and text_blob[start - 1] != "\n":
+            if len(lines) > 1:
+                lines = lines[1:]
+            else:
+                # The postcode's own line is longer than the window; start at a part boundary.
+                cut = lines[0].find(", ")
+                lines[0] = lines[0][cut + 2:] if cut != -1 else lines[0].split(None, 1)[-1]
+        return " ".join(line.strip() for line in lines if line.strip()) or None
     return None
 
 
 def extract_guide_price(text_blob: str) -> Optional[str]:
-    match = re.search(r"Guide\s*Price\s*[:\-]?\s*(£?[\d,]+(?:\.\d{2})?(?:\s*to\s*£?[\d,]+(?:\.\d{2})?)?)",
-                      text_blob,
-                      re.IGNORECASE)
+    match = GUIDE_PRICE_RE.search(text_blob)
     if match:
         return match.group(1).strip()
     return None
 
 
 def extract_auction_date(text_blob: str) -> Optional[str]:
-    match = re.search(r"Auction\s*Date\s*[:\-]?\s*([^\n]+)", text_blob, re.IGNORECASE)
-    if match:
-        return match.group(1).strip()
-    match = re.search(r"Bidding\s+closes\s*[:\-]?\s*([^\n]+)", text_blob, re.IGNORECASE)
-    if match:
-        return match.group(1).strip()
+    for pattern in AUCTION_DATE_RES:
+        match = pattern.search(text_blob)
+        if match:
+            return match.group(1).strip()
     return None
 
 
 def extract_lot_number(text_blob: str) -> Optional[str]:
-    match = re.search(r"Lot\s*(\d+)", text_blob, re.IGNORECASE)
+    match = LOT_NUMBER_RE.search(text_blob)
     if match:
         return match.group(1)
     return None
 
 
 def extract_status(soup: BeautifulSoup, text_blob: str) -> Optional[str]:
-    for cls in ["status", "availability", "flag", "badge"]:
-        node = soup.find(class_=re.compile(cls, re.IGNORECASE))
+    for pattern in STATUS_CLASS_RES:
+        node = soup.find(class_=pattern)
         text = _first_text(node)
         if text:
             return text
 
-    match = re.search(r"(available|for\s+sale|bidding\s+open|unsold|sold\s+prior|sold|withdrawn|postponed)",
-                      text_blob,
-                      re.IGNORECASE)
+    match = STATUS_RE.search(text_blob)
     if match:
         return match.group(1)
     return None
 
 
 def parse_property_page(html: str, url: str) -> PropertyRecord:
-    soup = BeautifulSoup(html, "html.parser")
-    text_blob = "\n".join(soup.stripped_strings)
+    soup = BeautifulSoup(html, "lxml")
+    # Newline-separated so line-bounded patterns (auction date, address) still work.
+    text_blob = soup.get_text("\n", strip=True)
 
     return PropertyRecord(
         url=url,
         title=extract_title(soup),
-        address=extract_address(soup),
+        address=extract_address(soup, text_blob),
         guide_price=extract_guide_price(text_blob),
         status=extract_status(soup, text_blob),
         auction_date=extract_auction_date(text_blob),
@@ -221,6 +323,54 @@ def parse_property_page(html: str, url: str) -> PropertyRecord:
     )
 
 
+def looks_sold(html: str) -> bool:
+    """Cheap pre-parse check that the page's status element flags it as sold.
+
+    A heuristic over raw HTML that targets the element extract_status would
+    pick, and errs towards False: anything it doesn't recognise is left to the
+    full parse and is_for_sale.
+    """
+    for match in STATUS_SCAN_RE.finditer(html):
+        if match.group("tag"):
+            if match.group("name").lower() in VOID_TAGS:
+                return False
+            return bool(SOLD_TEXT_RE.match(html, match.end()))
+    return False
+
+
+def fetch_property(
+    session: requests.Session,
+    url: str,
+    delay: float = 0.0,
+    parse_pool: Optional[Executor] = None,
+    skip_sold: bool = False,
+) -> Optional[PropertyRecord]:
+    """Fetch and parse one property page, then pause `delay` seconds.
+
+    The pause is per worker, so N workers issue at most N requests per `delay`.
+    With a `parse_pool`, parsing runs there instead of on the calling thread.
+    With `skip_sold`, pages that `looks_sold` are not parsed and None is returned.
+    """
+    html = fetch_text(session, url)
+    if delay:
+        time.sleep(delay)
+    if skip_sold and looks_sold(html):
+        return None
+    if parse_pool is not None:
+        return parse_pool.submit(parse_property_page, html, url).result()
+    return parse_property_page(html, url)
+
+
+def open_parse_pool(workers: int) -> AbstractContextManager[Optional[Executor]]:
+    """Process pool for HTML parsing, or a no-op context when `workers` <= 1.
+
+    Uses the spawn start method so workers don't fork the threaded fetcher.
+    """
+    if workers <= 1:
+        return nullcontext()
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
 def is_for_sale(record: PropertyRecord) -> bool:
     status = (record.status or "").lower()
     if status:
@@ -231,21 +381,43 @@ def is_for_sale(record: PropertyRecord) -> bool:
     return not status  # assume available if status is unknown
 
 
-def write_csv(path: str, records: Iterable[PropertyRecord]) -> None:
-    rows = list(records)
+@contextmanager
+def open_csv_writer(
+    path: str,
+    fieldnames: Sequence[str] = CSV_FIELDNAMES,
+    *,
+    flush_every: int = CSV_FLUSH_EVERY,
+) -> Iterator[Callable[[dict], None]]:
+    """Open ``path`` for CSV output and yield a function that writes one row.
+
+    Rows hit disk as they are written (flushed every ``flush_every`` rows), so
+    an interrupted run still leaves the records scraped so far.
+    """
+
     with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=["url", "title", "address", "guide_price", "status", "auction_date", "lot_number"],
-        )
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
-        for row in rows:
-            writer.writerow(row.to_row())
+        written = 0
+
+        def write_row(row: dict) -> None:
+            nonlocal written
+            writer.writerow(row)
+            written += 1
+            if written % flush_every == 0:
+                f.flush()
+
+        yield write_row
+
+
+def write_csv(path: str, records: Iterable[PropertyRecord]) -> None:
+    with open_csv_writer(path) as write_row:
+        for record in records:
+            write_row(record.to_row())
 
 
 def run(args: argparse.Namespace) -> int:
     logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
-    session = build_session(args.user_agent)
+    session = build_session(args.user_agent, pool_size=args.workers, cache=args.cache)
 
     try:
         property_urls = iter_sitemap_property_urls(session, args.sitemap)
@@ -258,21 +430,36 @@ def run(args: argparse.Namespace) -> int:
 
     logging.info("Discovered %s property URLs", len(property_urls))
 
-    records: List[PropertyRecord] = []
-    for idx, url in enumerate(property_urls, start=1):
-        logging.info("[%s/%s] Fetching property %s", idx, len(property_urls), url)
+    written = 0
+    with open_csv_writer(args.output) as write_row, open_parse_pool(args.parse_workers) as parse_executor, \
+            ThreadPoolExecutor(max_workers=args.workers) as pool:
+        pending = deque(
+            (url, pool.submit(fetch_property, session, url, args.delay, parse_executor, not args.include_sold))
+            for url in property_urls
+        )
+        idx = 0
         try:
-            html = fetch_text(session, url)
-            record = parse_property_page(html, url)
-            if args.include_sold or is_for_sale(record):
-                records.append(record)
-        except Exception as exc:
-            logging.warning("Skipping %s due to error: %s", url, exc)
-            continue
-        time.sleep(args.delay)
-
-    write_csv(args.output, records)
-    logging.info("Wrote %s records to %s", len(records), args.output)
+            while pending:
+                url, future = pending.popleft()
+                idx += 1
+                try:
+                    record = future.result()
+                except Exception as exc:
+                    logging.warning("Skipping %s due to error: %s", url, exc)
+                    continue
+                if record is None:
+                    logging.info("[%s/%s] Skipped sold property %s", idx, len(property_urls), url)
+                    continue
+                logging.info("[%s/%s] Fetched property %s", idx, len(property_urls), url)
+                if args.include_sold or is_for_sale(record):
+                    write_row(record.to_row())
+                    written += 1
+        except BaseException:
+            # Don't let the executor wait for every queued fetch before the error surfaces.
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    logging.info("Wrote %s records to %s", written, args.output)
     return 0
 
 
@@ -280,9 +467,17 @@ def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Scrape Auction House UK property details")
     parser.add_argument("--output", default="auctionhouse_properties.csv", help="CSV destination path")
     parser.add_argument("--sitemap", default=DEFAULT_SITEMAP_URL, help="Root sitemap URL")
-    parser.add_argument("--delay", type=float, default=DEFAULT_DELAY_SEC, help="Delay between requests (seconds)")
+    parser.add_argument("--delay", type=float, default=DEFAULT_DELAY_SEC, help="Delay between requests per worker (seconds)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of concurrent property fetches")
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=DEFAULT_PARSE_WORKERS,
+        help="Processes used to parse pages (<= 1 parses on the fetch threads)",
+    )
     parser.add_argument("--limit", type=int, help="Maximum number of properties to fetch (for testing)")
     parser.add_argument("--include-sold", action="store_true", help="Include properties flagged as sold/withdrawn")
+    parser.add_argument("--cache", action="store_true", help="Cache HTTP responses on disk for an hour between runs")
     parser.add_argument("--user-agent", default=DEFAULT_USER_AGENT, help="User-Agent header for HTTP requests")
     return parser
 
@@ -11,39 +11,112 @@ from __future__ import annotations
 
 import argparse
 import csv
-import json
+import multiprocessing
+import os
 import re
 import sys
+import threading
 import time
-from typing import Dict, Iterable, List, Optional
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from urllib.parse import urljoin, urlparse
 
+import orjson
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 NATIONAL_URL = "https://www.auctionhouse.co.uk/national"
 LOT_PATH_MARKER = "/lot/details/"
 DEFAULT_DELAY = 0.75
+DEFAULT_WORKERS = 8
+DEFAULT_PARSE_WORKERS = os.cpu_count() or 1
 DEFAULT_OUTPUT = "national_lots.csv"
+CSV_FIELDNAMES = [
+    "lot_number",
+    "title",
+    "address",
+    "guide_price",
+    "status",
+    "auction_date",
+    "url",
+]
+CSV_FLUSH_EVERY = 25
 USER_AGENT = (
     "Mozilla/5.0 (X11; Linux x86_64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
     "Chrome/123.0.0.0 Safari/537.36"
 )
 
+# Free-text fallbacks, in priority order per field.
+HTML_FIELD_RES: Dict[str, List[re.Pattern]] = {
+    "lot_number": [
+        re.compile(r"Lot\s*#?\s*(\d+)", re.IGNORECASE),
+        re.compile(r"Lot Number[:\s]*([\w-]+)", re.IGNORECASE),
+    ],
+    "guide_price": [
+        re.compile(r"Guide Price[:\s£]*([^|\n]+)", re.IGNORECASE),
+        re.compile(r"Price[:\s£]*([^|\n]+)", re.IGNORECASE),
+    ],
+    "auction_date": [
+        re.compile(r"Auction Date[:\s]*([A-Za-z0-9 ,:-]+)", re.IGNORECASE),
+        re.compile(r"Closes[:\s]*([A-Za-z0-9 ,:-]+)", re.IGNORECASE),
+    ],
+    "status": [
+        re.compile(r"Status[:\s]*([A-Za-z ]+)", re.IGNORECASE),
+        re.compile(r"Availability[:\s]*([A-Za-z ]+)", re.IGNORECASE),
+    ],
+}
+ADDRESS_CLASS_RE = re.compile("address", re.IGNORECASE)
+# Only anchor href values, so URLs in prose or <script> never reach the result.
+LOT_HREF_RE = re.compile(
+    r"""<a\s[^>]*?(?<![\w-])href\s*=\s*["'](https?://online\.auctionhouse\.co\.uk/lot/details/[^"'?#\s&]+)""",
+    re.IGNORECASE,
+)
+
 
 class FetchError(RuntimeError):
     """Raised when a remote page cannot be fetched successfully."""
 
 
+_DEFAULT_SESSION: Optional[requests.Session] = None
+_DEFAULT_SESSION_LOCK = threading.Lock()
+
+
+def build_session(pool_size: int = DEFAULT_WORKERS) -> requests.Session:
+    """Create a keep-alive session with a connection pool of `pool_size`."""
+
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _get_session() -> requests.Session:
+    """Return the shared module-level session, creating it on first use."""
+
+    global _DEFAULT_SESSION
+    with _DEFAULT_SESSION_LOCK:
+        if _DEFAULT_SESSION is None:
+            _DEFAULT_SESSION = build_session()
+        return _DEFAULT_SESSION
+
+
 def fetch_content(url: str, session: Optional[requests.Session] = None) -> str:
     """Retrieve a URL and return its text content.
 
+    Without an explicit `session`, a shared module-level session is used so
+    repeated calls reuse pooled connections.
+
     Raises:
         FetchError: if the response is not successful.
     """
 
-    sess = session or requests.Session()
+    sess = session or _get_session()
     try:
         resp = sess.get(url, headers={"User-Agent": USER_AGENT}, timeout=30)
     except requests.RequestException as exc:  # pragma: no cover - network
@@ -56,9 +129,27 @@ def fetch_content(url: str, session: Optional[requests.Session] = None) -> str:
 
 
 def find_lot_links(html: str, base_url: str = NATIONAL_URL) -> List[str]:
-    """Extract unique online lot URLs from the National landing page."""
+    """Extract unique online lot URLs from the National landing page.
+
+    Absolute lot hrefs are harvested with a regex over the raw HTML. If any
+    occurrence of the lot path is relative, entity-encoded, outside an anchor
+    href, or otherwise not matched, fall back to resolving every anchor
+    through BeautifulSoup so both paths always agree.
+    """
+
+    matches = []
+    for match in LOT_HREF_RE.finditer(html):
+        if html[match.end(): match.end() + 1] not in ("\"", "'", "?", "#"):
+            break  # entity or whitespace in the path; let BeautifulSoup decode it
+        matches.append(match.group(1))
+    else:
+        if len(matches) == html.count(LOT_PATH_MARKER):
+            return list(dict.fromkeys(matches))
+    return _find_lot_links_in_anchors(html, base_url)
 
-    soup = BeautifulSoup(html, "html.parser")
+
+def _find_lot_links_in_anchors(html: str, base_url: str = NATIONAL_URL) -> List[str]:
+    soup = BeautifulSoup(html, "lxml")
     links = []
     seen = set()
     for anchor in soup.select("a[href]"):
@@ -76,18 +167,19 @@ def find_lot_links(html: str, base_url: str = NATIONAL_URL) -> List[str]:
     return links
 
 
-def _load_json_ld(soup: BeautifulSoup) -> List[dict]:
-    payloads: List[dict] = []
+def _load_json_ld(soup: BeautifulSoup) -> Iterator[dict]:
+    """Yield JSON-LD objects lazily, parsing each script block only when reached."""
+
     for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
         try:
-            parsed = json.loads(script.string or "")
-        except json.JSONDecodeError:
+            # orjson rejects str subclasses such as bs4's Script, so pass bytes.
+            parsed = orjson.loads((script.string or "").encode())
+        except orjson.JSONDecodeError:
             continue
         if isinstance(parsed, list):
-            payloads.extend([p for p in parsed if isinstance(p, dict)])
+            yield from (p for p in parsed if isinstance(p, dict))
         elif isinstance(parsed, dict):
-            payloads.append(parsed)
-    return payloads
+            yield parsed
 
 
 def _flatten_address(address: dict) -> str:
@@ -106,21 +198,24 @@ def _flatten_address(address: dict) -> str:
     return ", ".join(components)
 
 
-def _extract_from_json_ld(payloads: List[dict]) -> Dict[str, str]:
+def _extract_from_json_ld(payloads: Iterable[dict]) -> Dict[str, str]:
     details: Dict[str, str] = {}
-    candidates = [
-        p
-        for p in payloads
-        if p.get("@type")
-        in (
-            "Product",
-            "RealEstateListing",
-            "Offer",
-            "SingleFamilyResidence",
-            "House",
-        )
-    ]
-    primary = candidates[0] if candidates else None
+    # Stops consuming (and parsing) payloads at the first listing-like block.
+    primary = next(
+        (
+            p
+            for p in payloads
+            if p.get("@type")
+            in (
+                "Product",
+                "RealEstateListing",
+                "Offer",
+                "SingleFamilyResidence",
+                "House",
+            )
+        ),
+        None,
+    )
 
     if primary:
         if primary.get("name"):
@@ -149,43 +244,22 @@ def _extract_from_json_ld(payloads: List[dict]) -> Dict[str, str]:
     return details
 
 
-def _regex_search(text: str, patterns: Iterable[str]) -> Optional[str]:
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-    return None
+def _scan_text_fields(text: str) -> Dict[str, str]:
+    """Return the first match of each field's patterns, tried in priority order."""
 
+    fields = {}
+    for field, patterns in HTML_FIELD_RES.items():
+        fields[field] = ""
+        for pattern in patterns:
+            match = pattern.search(text)
+            if match:
+                fields[field] = match.group(1).strip()
+                break
+    return fields
 
-def _extract_from_html(soup: BeautifulSoup) -> Dict[str, str]:
-    details: Dict[str, str] = {}
-    full_text = soup.get_text(" ", strip=True)
 
-    details["lot_number"] = _regex_search(
-        full_text,
-        [r"Lot\s*#?\s*(\d+)", r"Lot Number[:\s]*([\w-]+)"]
-    ) or ""
-
-    details["guide_price"] = _regex_search(
-        full_text,
-        [
-            r"Guide Price[:\s£]*([^|\n]+)",
-            r"Price[:\s£]*([^|\n]+)",
-        ],
-    ) or ""
-
-    details["auction_date"] = _regex_search(
-        full_text,
-        [
-            r"Auction Date[:\s]*([A-Za-z0-9 ,:-]+)",
-            r"Closes[:\s]*([A-Za-z0-9 ,:-]+)",
-        ],
-    ) or ""
-
-    details["status"] = _regex_search(
-        full_text,
-        [r"Status[:\s]*([A-Za-z ]+)", r"Availability[:\s]*([A-Za-z ]+)"]
-    ) or ""
+def _extract_from_html(soup: BeautifulSoup, full_text: str) -> Dict[str, str]:
+    details = _scan_text_fields(full_text)
 
     # Title and address fallbacks
     if not details.get("title"):
@@ -193,7 +267,7 @@ def _extract_from_html(soup: BeautifulSoup) -> Dict[str, str]:
         if heading:
             details["title"] = heading.get_text(" ", strip=True)
     if not details.get("address"):
-        addr = soup.find("address") or soup.find(class_=re.compile("address", re.I))
+        addr = soup.find("address") or soup.find(class_=ADDRESS_CLASS_RE)
         if addr:
             details["address"] = addr.get_text(" ", strip=True)
 
@@ -203,12 +277,13 @@ def _extract_from_html(soup: BeautifulSoup) -> Dict[str, str]:
 def parse_lot_page(html: str, url: str) -> Dict[str, str]:
     """Extract structured details from a lot detail page."""
 
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, "lxml")
     details: Dict[str, str] = {"url": url}
 
     json_ld = _load_json_ld(soup)
     details.update({k: v for k, v in _extract_from_json_ld(json_ld).items() if v})
-    html_fallbacks = _extract_from_html(soup)
+    full_text = soup.get_text(" ", strip=True)
+    html_fallbacks = _extract_from_html(soup, full_text)
     for key, value in html_fallbacks.items():
         if value and not details.get(key):
             details[key] = value
@@ -216,32 +291,81 @@ def parse_lot_page(html: str, url: str) -> Dict[str, str]:
     return details
 
 
-def write_csv(rows: List[Dict[str, str]], output_path: str) -> None:
-    fieldnames = [
-        "lot_number",
-        "title",
-        "address",
-        "guide_price",
-        "status",
-        "auction_date",
-        "url",
-    ]
+def fetch_lot(
+    url: str,
+    session: requests.Session,
+    delay: float = 0.0,
+    parse_pool: Optional[Executor] = None,
+) -> Dict[str, str]:
+    """Fetch and parse a single lot page, then pause for `delay` seconds.
+
+    When `parse_pool` is given the page is parsed in that executor.
+    """
+
+    lot_html = fetch_content(url, session=session)
+    if delay:
+        time.sleep(delay)
+    if parse_pool is not None:
+        return parse_pool.submit(parse_lot_page, lot_html, url).result()
+    return parse_lot_page(lot_html, url)
+
+
+def open_parse_pool(workers: int) -> AbstractContextManager[Optional[Executor]]:
+    """Return a spawn-based process pool for parsing, or a no-op context if `workers` <= 1."""
+
+    if workers <= 1:
+        return nullcontext()
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+@contextmanager
+def open_csv_writer(
+    output_path: str,
+    fieldnames: List[str] = CSV_FIELDNAMES,
+    flush_every: int = CSV_FLUSH_EVERY,
+) -> Iterator[Callable[[Dict[str, str]], None]]:
+    """Open a CSV file and yield a callable that writes one lot row to it.
+
+    Missing fields are written as empty strings and the file is flushed every
+    `flush_every` rows, so partial results survive an interrupted run.
+    """
+
     with open(output_path, "w", newline="", encoding="utf-8") as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
-        for row in rows:
+        written = 0
+
+        def write_row(row: Dict[str, str]) -> None:
+            nonlocal written
             writer.writerow({field: row.get(field, "") for field in fieldnames})
+            written += 1
+            if written % flush_every == 0:
+                csvfile.flush()
+
+        yield write_row
+
+
+def write_csv(rows: List[Dict[str, str]], output_path: str) -> None:
+    with open_csv_writer(output_path) as write_row:
+        for row in rows:
+            write_row(row)
 
 
 def scrape_national_lots(
     output: str = DEFAULT_OUTPUT,
     delay: float = DEFAULT_DELAY,
     max_lots: Optional[int] = None,
+    workers: int = DEFAULT_WORKERS,
+    parse_workers: int = DEFAULT_PARSE_WORKERS,
 ) -> List[Dict[str, str]]:
-    """Discover and collect lot details from the National landing page."""
+    """Discover and collect lot details from the National landing page.
 
-    session = requests.Session()
-    session.headers.update({"User-Agent": USER_AGENT})
+    Lot pages are fetched by `workers` threads, each pausing `delay` seconds
+    between its own requests, and parsed by `parse_workers` processes. Rows
+    are written to `output` as they arrive.
+    """
+
+    session = build_session(pool_size=workers)
 
     national_html = fetch_content(NATIONAL_URL, session=session)
     lot_urls = find_lot_links(national_html)
@@ -249,21 +373,30 @@ def scrape_national_lots(
         lot_urls = lot_urls[:max_lots]
 
     rows: List[Dict[str, str]] = []
-    for idx, lot_url in enumerate(lot_urls, start=1):
+    with open_csv_writer(output) as write_row, open_parse_pool(parse_workers) as parse_executor, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque(
+            (lot_url, pool.submit(fetch_lot, lot_url, session, delay, parse_executor)) for lot_url in lot_urls
+        )
+        idx = 0
         try:
-            lot_html = fetch_content(lot_url, session=session)
-        except FetchError as exc:  # pragma: no cover - network
-            print(f"[warn] Skipping {lot_url}: {exc}", file=sys.stderr)
-            continue
-
-        details = parse_lot_page(lot_html, lot_url)
-        rows.append(details)
-        print(f"[{idx}/{len(lot_urls)}] Collected lot {details.get('lot_number', '?')} from {lot_url}")
+            while pending:
+                lot_url, future = pending.popleft()
+                idx += 1
+                try:
+                    details = future.result()
+                except FetchError as exc:  # pragma: no cover - network
+                    print(f"[warn] Skipping {lot_url}: {exc}", file=sys.stderr)
+                    continue
+
+                write_row(details)
+                rows.append(details)
+                print(f"[{idx}/{len(lot_urls)}] Collected lot {details.get('lot_number', '?')} from {lot_url}")
+        except BaseException:
+            # Don't let the executor wait for every queued fetch before the error surfaces.
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
 
-        if delay:
-            time.sleep(delay)
-
-    write_csv(rows, output)
     print(f"Wrote {len(rows)} lot records to {output}")
     return rows
 
@@ -282,7 +415,19 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
         "--delay",
         type=float,
         default=DEFAULT_DELAY,
-        help="Seconds to wait between lot requests (default: %(default).2f)",
+        help="Seconds each worker waits between lot requests (default: %(default).2f)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of lot pages fetched concurrently (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=DEFAULT_PARSE_WORKERS,
+        help="Processes used to parse lot pages; <= 1 parses in-thread (default: %(default)s)",
     )
     parser.add_argument(
         "--max-lots",
@@ -300,6 +445,8 @@ def main(argv: Optional[List[str]] = None) -> None:
             output=args.output,
             delay=args.delay,
             max_lots=args.max_lots,
+            workers=args.workers,
+            parse_workers=args.parse_workers,
         )
     except FetchError as exc:  # pragma: no cover - network
         print(f"Failed to scrape National Weekly lots: {exc}", file=sys.stderr)
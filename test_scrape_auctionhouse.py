@@ -1,20 +1,34 @@
-"""Integration checks for the Auction House scraper.
+"""Checks for the Auction House scraper.
 
-These tests fetch live data from auctionhouse.co.uk to confirm that
-we enumerate all properties currently marketed in the National Weekly
+The integration test fetches live data from auctionhouse.co.uk to confirm
+that we enumerate all properties currently marketed in the National Weekly
 auction. If the site is unreachable from the execution environment the
-test will be skipped rather than fail.
+test will be skipped rather than fail. The remaining tests run offline
+against inline HTML or a local HTTP server.
 """
 
 from __future__ import annotations
 
+import csv
+import gzip
+import os
+import tempfile
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+from bs4 import BeautifulSoup
 
 from scrape_auctionhouse import (
     build_session,
+    extract_address,
     fetch_text,
     is_for_sale,
+    iter_sitemap_locs,
     iter_sitemap_property_urls,
+    looks_sold,
+    main,
     parse_property_page,
 )
 
@@ -27,7 +41,8 @@ EXPECTED_NATIONAL_WEEKLY_FOR_SALE = 186
 
 class AuctionHouseIntegrationTest(unittest.TestCase):
     def test_discovers_all_national_weekly_for_sale_properties(self) -> None:
-        session = build_session()
+        # Cached so reruns don't refetch the sitemap and every property page.
+        session = build_session(cache=True)
         try:
             property_urls = iter_sitemap_property_urls(session)
         except Exception as exc:  # pragma: no cover - network guard
@@ -56,5 +71,186 @@ class AuctionHouseIntegrationTest(unittest.TestCase):
         )
 
 
+def _page(body: str) -> str:
+    return f"<html><body>{body}</body></html>"
+
+
+class LooksSoldTest(unittest.TestCase):
+    SOLD_PAGES = [
+        '<div class="lot-status"><span> Sold </span></div><p>Guide Price: £100,000</p>',
+        "<div class='Status-Flag' id=x>\n<b>Withdrawn</b> prior</div>",
+    ]
+    LIVE_PAGES = [
+        # Empty status element followed by sold wording in sibling markup.
+        '<p>Bidding open</p><div class="status"></div><ul><li>Sold lots</li></ul><p>Guide Price: £100,000</p>',
+        # Sold markup inside a comment or script ahead of the real status.
+        '<!-- <div class="status">Sold</div> --><div class="status">Available</div><p>Guide Price: £1</p>',
+        '<script>var t = \'<span class="status">Sold</span>\';</script>'
+        '<div class="status">Available</div><p>Guide Price: £1</p>',
+        '<div class="lot-status">Available</div><div class="badge status">Sold</div>',
+        '<p>Sold properties</p><div class="status">Available</div><p>Guide Price: £1</p>',
+        '<div class="lot-status"> Unsold </div>',
+        "<div>no status</div>",
+        # A void status element has no text; the sold wording after it is a sibling's.
+        '<p>Available now</p><img class="status-icon" src="x.png">Sold lots nearby<p>Guide Price: £100,000</p>',
+        # data-class is not the class attribute.
+        '<div data-class="status">Sold</div><div class="status">Available</div><p>Guide Price: £1</p>',
+    ]
+
+    def test_flags_pages_whose_status_element_says_sold(self) -> None:
+        for body in self.SOLD_PAGES:
+            html = _page(body)
+            self.assertTrue(looks_sold(html), body)
+            self.assertFalse(is_for_sale(parse_property_page(html, "https://example.com/property/1")), body)
+
+    def test_never_flags_a_page_the_full_parse_keeps(self) -> None:
+        for body in self.LIVE_PAGES:
+            html = _page(body)
+            self.assertFalse(looks_sold(html), body)
+
+
+class ExtractAddressTest(unittest.TestCase):
+    def _address(self, body: str):
+        soup = BeautifulSoup(_page(body), "lxml")
+        return extract_address(soup, soup.get_text("\n", strip=True))
+
+    def test_prefers_address_container(self) -> None:
+        body = '<p>Intro</p><div class="property-address">1 High St, York YO1 7HH</div>'
+        self.assertEqual(self._address(body), "1 High St, York YO1 7HH")
+
+    def test_postcode_fallback_keeps_text_before_postcode_element(self) -> None:
+        body = "<div><span>12 Mill Lane</span>, <span>Leeds</span> <span>LS1 4AB</span></div>"
+        self.assertEqual(self._address(body), "12 Mill Lane , Leeds LS1 4AB")
+
+    def test_postcode_fallback_drops_partially_cut_line(self) -> None:
+        body = "<p>" + "word " * 30 + "</p><p>3 Church Road</p><p>Bath BA1 1AA</p>"
+        self.assertEqual(self._address(body), "3 Church Road Bath BA1 1AA")
+
+    def test_postcode_fallback_starts_long_line_at_part_boundary(self) -> None:
+        body = "<p>Flat 4, Riverside Court, 123 Some Very Long Street Name, Some Village, Fakenham, Norfolk NR21 0AA</p>"
+        self.assertEqual(self._address(body), "123 Some Very Long Street Name, Some Village, Fakenham, Norfolk NR21 0AA")
+
+    def test_no_postcode(self) -> None:
+        self.assertIsNone(self._address("<p>Nothing here</p>"))
+
+
+class LocalSite:
+    """Serve ``{path: (content_type, body)}`` on localhost for the duration of a test."""
+
+    def __init__(self) -> None:
+        self.pages: Dict[str, Tuple[str, bytes, bool]] = {}
+        pages = self.pages
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server API
+                if self.path not in pages:
+                    self.send_error(404)
+                    return
+                content_type, body, gzipped = pages[self.path]
+                if gzipped:
+                    body = gzip.compress(body)
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                if gzipped:
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def add(self, path: str, body: str, content_type: str = "text/html", gzipped: bool = False) -> str:
+        self.pages[path] = (content_type, body.encode("utf-8"), gzipped)
+        return self.base + path
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _urlset(urls) -> str:
+    entries = "".join(f"<url><loc>{url}</loc></url>" for url in urls)
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+
+def _sitemap_index(urls) -> str:
+    entries = "".join(f"<sitemap><loc>{url}</loc></sitemap>" for url in urls)
+    return (
+        '<?xml version="1.0"?>'
+        f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>'
+    )
+
+
+class SitemapTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.site = LocalSite()
+        self.addCleanup(self.site.close)
+        self.session = build_session()
+        self.addCleanup(self.session.close)
+
+    def test_iter_sitemap_locs_reports_root_tag(self) -> None:
+        index = self.site.add("/sitemap.xml", _sitemap_index(["https://x/a.xml"]), "application/xml")
+        urlset = self.site.add("/a.xml", _urlset([" https://x/property/1 ", "https://x/about"]), "application/xml")
+
+        self.assertEqual(list(iter_sitemap_locs(self.session, index)), [("sitemapindex", "https://x/a.xml")])
+        self.assertEqual(
+            list(iter_sitemap_locs(self.session, urlset)),
+            [("urlset", "https://x/property/1"), ("urlset", "https://x/about")],
+        )
+
+    def test_follows_index_to_property_urls(self) -> None:
+        child_a = self.site.add("/a.xml", _urlset(["https://x/property/2", "https://x/about"]), "application/xml")
+        child_b = self.site.add(
+            "/b.xml",
+            _urlset(["https://x/properties/1", "https://x/property/2"]),
+            "application/xml",
+            gzipped=True,
+        )
+        index = self.site.add("/sitemap.xml", _sitemap_index([child_a, child_b]), "application/xml")
+
+        self.assertEqual(
+            iter_sitemap_property_urls(self.session, index),
+            ["https://x/properties/1", "https://x/property/2"],
+        )
+
+    def test_unparseable_sitemap_is_skipped(self) -> None:
+        broken = self.site.add("/broken.xml", "<urlset><url><loc>https://x/property/1", "application/xml")
+        index = self.site.add("/sitemap.xml", _sitemap_index([broken]), "application/xml")
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(iter_sitemap_property_urls(self.session, index), [])
+
+
+class RunTest(unittest.TestCase):
+    def test_writes_for_sale_properties_in_sitemap_order(self) -> None:
+        site = LocalSite()
+        self.addCleanup(site.close)
+        pages = {
+            "/property/01": '<h1>One</h1><p>Guide Price: £100,000</p><p>Lot 1</p>',
+            "/property/02": '<div class="status">Sold</div><p>Guide Price: £1</p>',
+            "/property/03": '<h1>Three</h1><div class="badge">Withdrawn</div>',
+            "/property/04": '<h1>Four</h1><p>Guide Price: £250,000</p><p>Lot 4</p>',
+        }
+        urls = [site.add(path, _page(body)) for path, body in pages.items()]
+        sitemap = site.add("/sitemap.xml", _urlset(urls), "application/xml")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "out.csv")
+            for parse_workers in ("1", "2"):
+                with self.subTest(parse_workers=parse_workers):
+                    argv = ["--sitemap", sitemap, "--output", output, "--delay", "0",
+                            "--workers", "4", "--parse-workers", parse_workers]
+                    with self.assertLogs(level="INFO"):
+                        self.assertEqual(main(argv), 0)
+                    with open(output, newline="", encoding="utf-8") as f:
+                        rows = list(csv.DictReader(f))
+                    self.assertEqual([row["url"] for row in rows], [urls[0], urls[3]])
+                    self.assertEqual([row["lot_number"] for row in rows], ["1", "4"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,167 @@
+"""Offline checks for the National Weekly lot scraper."""
+
+from __future__ import annotations
+
+import contextlib
+import csv
+import io
+import os
+import random
+import re
+import tempfile
+import time
+import unittest
+from typing import Dict, Iterable, Optional
+from unittest import mock
+
+import scrape_national_lots
+from scrape_national_lots import (
+    NATIONAL_URL,
+    FetchError,
+    _find_lot_links_in_anchors,
+    _scan_text_fields,
+    find_lot_links,
+    scrape_national_lots as scrape,
+)
+
+# The per-field patterns as originally searched one at a time, in priority order.
+REFERENCE_PATTERNS = {
+    "lot_number": [r"Lot\s*#?\s*(\d+)", r"Lot Number[:\s]*([\w-]+)"],
+    "guide_price": [r"Guide Price[:\s£]*([^|\n]+)", r"Price[:\s£]*([^|\n]+)"],
+    "auction_date": [r"Auction Date[:\s]*([A-Za-z0-9 ,:-]+)", r"Closes[:\s]*([A-Za-z0-9 ,:-]+)"],
+    "status": [r"Status[:\s]*([A-Za-z ]+)", r"Availability[:\s]*([A-Za-z ]+)"],
+}
+
+
+def _reference_regex_search(text: str, patterns: Iterable[str]) -> Optional[str]:
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def _reference_fields(text: str) -> Dict[str, str]:
+    return {
+        field: _reference_regex_search(text, patterns) or ""
+        for field, patterns in REFERENCE_PATTERNS.items()
+    }
+
+
+class ScanTextFieldsTest(unittest.TestCase):
+    TOKENS = [
+        "Lot 12",
+        "Lot #7",
+        "Lot Number: A-5",
+        "LOT",
+        "Guide Price: £100,000",
+        "guide price",
+        "Price £5",
+        "price",
+        "Auction Date: 12 March 2025",
+        "Closes 3pm",
+        "closes",
+        "Status: Available",
+        "Availability: sold",
+        "status",
+        "|",
+        "\n",
+        "foo",
+    ]
+
+    def test_matches_per_field_search_on_random_text(self) -> None:
+        rng = random.Random(1)
+        for _ in range(5000):
+            text = " ".join(rng.choice(self.TOKENS) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(_scan_text_fields(text), _reference_fields(text), text)
+
+    def test_earlier_pattern_wins_over_earlier_position(self) -> None:
+        text = "Price: £5 | Closes 3pm | Lot Number: X-1 | Lot 4 | Guide Price: £90,000 | Auction Date: 1 May"
+        fields = _scan_text_fields(text)
+        self.assertEqual(fields["guide_price"], "90,000")
+        self.assertEqual(fields["auction_date"], "1 May")
+        self.assertEqual(fields["lot_number"], "4")
+        self.assertEqual(fields["status"], "")
+
+
+LOT = "https://online.auctionhouse.co.uk/lot/details"
+
+
+class FindLotLinksTest(unittest.TestCase):
+    ANCHOR_PAGES = [
+        f'<a href="{LOT}/1?x=1">a</a><a href=\'{LOT}/2#f\'>b</a><a href="{LOT}/1">c</a>',
+        f'<a href="{LOT}/3?a=1&amp;b=2">a</a><a href="{LOT}/4&amp;x">b</a>',
+        f'<a href="{LOT}/5">a</a><a href="/lot/details/6">relative</a>',
+        f'<a href="http://online.auctionhouse.co.uk/lot/details/7">a</a><a href="/other">b</a>',
+    ]
+
+    def test_matches_anchor_walk(self) -> None:
+        for body in self.ANCHOR_PAGES:
+            html = f"<html><body>{body}</body></html>"
+            for base in ("https://www.auctionhouse.co.uk/national", "https://online.auctionhouse.co.uk/"):
+                self.assertEqual(find_lot_links(html, base), _find_lot_links_in_anchors(html, base), body)
+
+    def test_entity_in_path_is_decoded(self) -> None:
+        html = f'<a href="{LOT}/4&amp;x">b</a>'
+        self.assertEqual(find_lot_links(html), [f"{LOT}/4&x"])
+
+    def test_mixed_absolute_and_relative_links(self) -> None:
+        html = (
+            f'<p>See {LOT}/9 for details.</p><a href="{LOT}/1">a</a><a href="/lot/details/2?ref=x">b</a>'
+            f'<script>var next = "{LOT}/8";</script><a class="lot" href="{LOT}/3#top">c</a>'
+        )
+        expected = [f"{LOT}/1", f"{LOT}/2", f"{LOT}/3"]
+        self.assertEqual(find_lot_links(html, "https://online.auctionhouse.co.uk/"), expected)
+        self.assertEqual(_find_lot_links_in_anchors(html, "https://online.auctionhouse.co.uk/"), expected)
+
+class ScrapeNationalLotsTest(unittest.TestCase):
+    PAGES = {
+        NATIONAL_URL: "".join(f'<a href="{LOT}/{i}">Lot {i}</a>' for i in range(1, 6)),
+        **{f"{LOT}/{i}": f"<html><body><h1>House {i}</h1><p>Lot {i} | Guide Price: £{i}00,000</p></body></html>"
+           for i in range(1, 6)},
+    }
+
+    def _fetch(self, url, session=None):
+        if url == f"{LOT}/3":
+            raise FetchError(f"Failed to fetch {url}: HTTP 500")
+        return self.PAGES[url]
+
+    def test_rows_follow_link_order_and_skip_failures(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "lots.csv")
+            for parse_workers in (1, 2):
+                with self.subTest(parse_workers=parse_workers), \
+                        mock.patch.object(scrape_national_lots, "fetch_content", self._fetch), \
+                        contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                    rows = scrape(output=output, delay=0, workers=3, parse_workers=parse_workers)
+
+                    self.assertEqual([row["lot_number"] for row in rows], ["1", "2", "4", "5"])
+                    with open(output, newline="", encoding="utf-8") as f:
+                        written = list(csv.DictReader(f))
+                    self.assertEqual([row["url"] for row in written], [f"{LOT}/{i}" for i in (1, 2, 4, 5)])
+                    self.assertEqual(written[0]["title"], "House 1")
+                    self.assertEqual(written[0]["guide_price"], "100,000")
+
+    def test_unexpected_error_cancels_queued_fetches(self) -> None:
+        fetched = []
+
+        def fetch(url, session=None):
+            fetched.append(url)
+            if url == f"{LOT}/1":
+                raise RuntimeError("boom")
+            if url == f"{LOT}/2":
+                time.sleep(0.2)
+            return self.PAGES[url]
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(scrape_national_lots, "fetch_content", fetch), \
+                contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(RuntimeError):
+                scrape(output=os.path.join(tmp, "lots.csv"), delay=0, workers=1, parse_workers=1)
+
+        self.assertNotIn(f"{LOT}/4", fetched)
+        self.assertNotIn(f"{LOT}/5", fetched)
+
+
+if __name__ == "__main__":
+    unittest.main()